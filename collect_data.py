@@ -3,97 +3,241 @@ import pylsl
 import numpy as np
 import pandas as pd
 
-import time
-import pylsl
-import numpy as np
-import pandas as pd
+from functools import lru_cache
+
+import matplotlib.pyplot as plt
+from scipy import signal
+from scipy.fft import set_workers
 
-def collect_eeg_data(duration=60, chunk_size=12):
+FREQ_BANDS = {
+    'Delta': (0.5, 4),
+    'Theta': (4, 8),
+    'Alpha': (8, 13),
+    'Beta': (13, 30),
+    'Gamma': (30, 50),
+}
+
+BAND_ORDER = tuple(FREQ_BANDS)
+
+FS = 256  # Muse sampling rate in Hz
+
+def collect_eeg_data(duration=60, poll_interval=0.5):
     """
     Collect EEG data for specified duration
-    
+
     Args:
         duration (int): Duration to collect in seconds
-        chunk_size (int): Number of samples to collect per chunk
-    
+        poll_interval (float): How long each pull may block, in seconds
+
     Returns:
         pd.DataFrame: Collected EEG data
     """
-    # Find EEG stream
+    # Find EEG stream with one blocking resolve instead of polling
     print("Looking for EEG stream...")
-    streams = pylsl.resolve_stream('type', 'EEG')
-    
-    # Wait for stream to become available
-    timeout = 10
-    start_wait = time.time()
-    while not streams:
-        if time.time() - start_wait > timeout:
-            print("Timeout: No EEG stream found. Make sure start_stream.py is running.")
-            return None
-        print("Waiting for EEG stream...")
-        time.sleep(1)
-        streams = pylsl.resolve_stream('type', 'EEG')
-    
+    streams = pylsl.resolve_byprop('type', 'EEG', minimum=1, timeout=10)
+    if not streams:
+        print("Timeout: No EEG stream found. Make sure start_stream.py is running.")
+        return None
+
     inlet = pylsl.StreamInlet(streams[0])
-    
-    # Initialize data collection
-    eeg_data = []
+
+    # Initialize data collection: preallocate one float32 buffer for the
+    # whole capture (20% headroom) instead of growing a list of lists
     channel_names = ['TP9', 'AF7', 'AF8', 'TP10']
+    capacity = int(duration * FS * 1.2)
+    buffer = np.empty((capacity, len(channel_names)), dtype=np.float32)
+    ts_buffer = np.empty(capacity, dtype=np.float64)
+    n_samples = 0
+    # Block in pull_chunk until up to poll_interval's worth of samples
+    # arrived (20% headroom), rather than waking up per tiny chunk
+    max_samples = int(FS * poll_interval * 1.2)
+    # pylsl writes pulled samples straight into this array (Muse streams
+    # float32), skipping the list-of-lists round trip per pull
+    dest = np.empty((max_samples, len(channel_names)), dtype=np.float32)
     start_time = time.time()
-    
+
     print(f"Starting data collection for {duration} seconds...")
-    
+
     try:
         while (time.time() - start_time) < duration:
-            data, timestamp = inlet.pull_chunk(timeout=1.0, 
-                                             max_samples=chunk_size)
-            if data:
-                eeg_data.extend(data)
+            _, timestamps = inlet.pull_chunk(timeout=poll_interval,
+                                             max_samples=max_samples,
+                                             dest_obj=dest)
+            if timestamps:
+                k = len(timestamps)
+                if n_samples + k > capacity:
+                    # Double instead of dropping samples; amortized O(1)
+                    capacity *= 2
+                    buffer = np.resize(buffer, (capacity, len(channel_names)))
+                    ts_buffer = np.resize(ts_buffer, capacity)
+                buffer[n_samples:n_samples + k] = dest[:k]
+                ts_buffer[n_samples:n_samples + k] = timestamps
+                n_samples += k
                 # Optional: Print a dot to show progress
                 print(".", end="", flush=True)
-                
+
     except KeyboardInterrupt:
         print("\nData collection interrupted by user")
-    
+
     print("\n")  # New line after progress dots
-    
+
     # Convert to DataFrame
-    if eeg_data:
-        df = pd.DataFrame(eeg_data, columns=channel_names)
+    if n_samples:
+        df = pd.DataFrame(buffer[:n_samples], columns=channel_names,
+                          index=pd.Index(ts_buffer[:n_samples],
+                                         name='timestamp'),
+                          copy=False)
         print(f"Collected {len(df)} samples")
         return df
     else:
         print("No data collected")
         return None
 
+@lru_cache(maxsize=None)
+def _band_edges(fs, nperseg):
+    """
+    PSD bin indices of the frequency-band edges
+
+    The bands are contiguous in frequency, so one sorted edge array is
+    enough to integrate all of them in a single reduceat. The grid only
+    depends on fs and the segment length, so the result is cached.
+    """
+    frequencies = np.fft.rfftfreq(nperseg, d=1.0 / fs)
+    bounds = [FREQ_BANDS[name][0] for name in BAND_ORDER]
+    bounds.append(FREQ_BANDS[BAND_ORDER[-1]][1])
+    return np.searchsorted(frequencies, bounds)
+
+def compute_band_powers(data, fs=256):
+    """
+    Compute band powers for all channels with a single batched rFFT
+
+    Estimates the PSD for the whole (channels, samples) matrix with one
+    scipy.signal.welch call along axis=-1 instead of looping channel by
+    channel. Welch applies its own window per segment, so no explicit
+    windowing is done here.
+
+    Args:
+        data (np.ndarray): EEG data with shape (channels, samples)
+        fs (int): Sampling rate in Hz
+
+    Returns:
+        np.ndarray: Band powers with shape (channels, bands), columns
+            ordered as BAND_ORDER, or None if the capture is too short
+            to resolve every band on the Welch grid
+    """
+    nperseg = min(fs, data.shape[1])
+    with set_workers(-1):
+        _, psd = signal.welch(data, fs=fs, nperseg=nperseg, axis=-1)
+
+    # Integrate all bands at once; the trailing reduceat group covers
+    # everything above the gamma edge and is dropped
+    edges = _band_edges(fs, nperseg)
+    if edges[-1] >= psd.shape[-1] or np.any(np.diff(edges) == 0):
+        # Frequency resolution too coarse: some band holds no PSD bin
+        return None
+    band_sums = np.add.reduceat(psd, edges, axis=-1)[:, :-1]
+    # Dividing by an int array would promote to float64; keep the PSD dtype
+    return band_sums / np.diff(edges).astype(psd.dtype)
+
 def analyze_data(df):
     """
     Perform basic analysis on the EEG data
     """
     if df is None:
         return
-    
+
     print("\nBasic Statistics:")
     print(df.describe())
-    
-    # Calculate power bands (simple example)
+
+    # One vectorized reduction across all channels, not a call per column
+    data = np.ascontiguousarray(df.to_numpy(dtype=np.float32).T)
+    means = data.mean(axis=1)
+
     print("\nChannel Averages:")
-    for channel in df.columns:
-        print(f"{channel}: {df[channel].mean():.2f}")
+    for channel, mean in zip(df.columns, means):
+        print(f"{channel}: {mean:.2f}")
+
+    # Calculate power bands for every channel in one batched pass,
+    # keeping the data in float32 so the PSD stays single precision
+    band_powers = compute_band_powers(data)
+    if band_powers is None:
+        print("\nCapture too short for band-power analysis, skipping")
+        return
+    print("\nBand Powers (per channel):")
+    for i, name in enumerate(BAND_ORDER):
+        values = ", ".join(f"{p:.2f}" for p in band_powers[:, i])
+        print(f"{name}: {values}")
+
+    # Relative powers and the classic ratios, all as vector arithmetic
+    relative = band_powers / band_powers.sum(axis=1, keepdims=True)
+    theta_beta = band_powers[:, 1] / band_powers[:, 3]
+    alpha_beta = band_powers[:, 2] / band_powers[:, 3]
+
+    print("\nRelative Band Powers (per channel):")
+    for i, name in enumerate(BAND_ORDER):
+        values = ", ".join(f"{p:.2f}" for p in relative[:, i])
+        print(f"{name}: {values}")
+
+    print("\nTheta/Beta ratio:", ", ".join(f"{r:.2f}" for r in theta_beta))
+    print("Alpha/Beta ratio:", ", ".join(f"{r:.2f}" for r in alpha_beta))
+
+    # Average each band across channels in one vector reduction
+    avg_powers = band_powers.mean(axis=0)
+    print("\nAverage Band Powers (all channels):")
+    for name, power in zip(BAND_ORDER, avg_powers):
+        print(f"{name}: {power:.2f}")
+
+def save_data(df, filename):
+    """
+    Save a capture as an .npz archive (samples, timestamps, channels)
+
+    Binary float32 is both much faster to write and much smaller than
+    CSV for EEG data; use export_csv for tools that need text.
+    """
+    np.savez(filename,
+             data=df.to_numpy(dtype=np.float32),
+             timestamps=df.index.to_numpy(),
+             channels=np.asarray(df.columns, dtype=str))
+
+def export_csv(df, filename):
+    """
+    Export a capture to CSV for tools that cannot read npz
+    """
+    df.to_csv(filename, index_label='timestamp')
+
+def plot_data(df):
+    """
+    Plot the collected EEG data, one subplot per channel
+
+    Rendering happens once after the capture so plotting never competes
+    with the acquisition loop for time.
+    """
+    if df is None:
+        return
+
+    fig, axes = plt.subplots(len(df.columns), 1, sharex=True)
+    for ax, channel in zip(axes, df.columns):
+        ax.plot(df[channel].to_numpy())
+        ax.set_ylabel(channel)
+    axes[-1].set_xlabel('Sample')
+    plt.show()
 
 def main():
     try:
         # Collect data
         data = collect_eeg_data(duration=30)  # Collect 30 seconds of data
-        
+
         if data is not None:
             # Analyze data
             analyze_data(data)
-            
+
             # Save data
-            filename = f'muse_eeg_data_{int(time.time())}.csv'
-            data.to_csv(filename, index=False)
+            filename = f'muse_eeg_data_{int(time.time())}.npz'
+            save_data(data, filename)
             print(f"\nData saved to {filename}")
+
+            # Plot data (single render, after the capture)
+            plot_data(data)
     
     except KeyboardInterrupt:
         print("\nProgram interrupted by user")